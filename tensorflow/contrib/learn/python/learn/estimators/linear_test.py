@@ -20,6 +20,7 @@ from __future__ import division
 from __future__ import print_function
 
 import functools
+import os
 import tempfile
 
 import numpy as np
@@ -30,20 +31,227 @@ from tensorflow.contrib.learn.python.learn.estimators import estimator_test_util
 from tensorflow.contrib.learn.python.learn.metric_spec import MetricSpec
 
 
+# Training budgets for `LinearClassifierTest`, in one place for re-tuning.
+# Tests that only check the structure of the trained model (variable names,
+# export) need a single step.
+_STEPS = {
+    'default': 100,
+    'train': 100,
+    'train_more': 200,
+    'iris': 100,
+    'fractional_labels': 500,
+    'partitioned_variables': 200,
+    'save_load': 30,
+    'structural': 1,
+    'sdca_real_valued': 100,
+    'sdca_categorical': 50,
+    'sdca_crossed': 10,
+}
+
+# Pre-integerized language ids for tests that do not exercise hashing, so
+# their graphs skip the per-step StringToHashBucketFast op.
+_LANGUAGE_BUCKET_SIZE = 100
+_ENGLISH_ID = np.array([7], dtype=np.int64)
+_HINDI_ID = np.array([42], dtype=np.int64)
+
+# Feature columns shared by the tests that feed 'age' and 'language'.
+_AGE_COL = tf.contrib.layers.real_valued_column('age')
+_LANGUAGE_COL = tf.contrib.layers.sparse_column_with_hash_bucket('language',
+                                                                100)
+
+# Constant sparse inputs. Keeping them as `SparseTensorValue`s with int64
+# indices and shapes means each input_fn call converts ready-made arrays
+# instead of walking nested Python lists.
+_LANGUAGE_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0], [0, 1], [2, 0]], dtype=np.int64),
+    values=['en', 'fr', 'zh'],
+    shape=np.array([3, 2], dtype=np.int64))
+_COUNTRY_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0], [1, 3], [2, 1]], dtype=np.int64),
+    values=['IT', 'US', 'GB'],
+    shape=np.array([3, 5], dtype=np.int64))
+_ENGLISH_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0]], dtype=np.int64),
+    values=['english'],
+    shape=np.array([1, 1], dtype=np.int64))
+_ENGLISH_ID_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0]], dtype=np.int64),
+    values=_ENGLISH_ID,
+    shape=np.array([1, 1], dtype=np.int64))
+_HINDI_ID_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0]], dtype=np.int64),
+    values=_HINDI_ID,
+    shape=np.array([1, 1], dtype=np.int64))
+_JOINT_AGE_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0]], dtype=np.int64),
+    values=['1'],
+    shape=np.array([1, 1], dtype=np.int64))
+# Languages for 3 examples, the second of which has none.
+_MISSING_LANGUAGE_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0], [2, 0]], dtype=np.int64),
+    values=['Swahili', 'turkish'],
+    shape=np.array([3, 1], dtype=np.int64))
+_EVAL_LANGUAGE_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0], [1, 0]], dtype=np.int64),
+    values=['greek', 'chinese'],
+    shape=np.array([2, 1], dtype=np.int64))
+_WEIGHTED_PRICE_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0], [1, 0], [2, 0]], dtype=np.int64),
+    values=np.array([2., 3., 1.], dtype=np.float32),
+    shape=np.array([3, 5], dtype=np.int64))
+_WEIGHTED_COUNTRY_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0], [1, 0], [2, 0]], dtype=np.int64),
+    values=['IT', 'US', 'GB'],
+    shape=np.array([3, 5], dtype=np.int64))
+_CROSSED_LANGUAGE_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0], [1, 0], [2, 0]], dtype=np.int64),
+    values=['english', 'italian', 'spanish'],
+    shape=np.array([3, 1], dtype=np.int64))
+_CROSSED_COUNTRY_VALUE = tf.SparseTensorValue(
+    indices=np.array([[0, 0], [1, 0], [2, 0]], dtype=np.int64),
+    values=['US', 'IT', 'MX'],
+    shape=np.array([3, 1], dtype=np.int64))
+
+# The 4 example 'x' problem: x is always 1 and only the first label is 1.
+_ONES_4x1 = np.ones((4, 1), dtype=np.float32)
+_LABELS_4 = np.array([[1.], [0.], [0.], [0.]], dtype=np.float32)
+
+_IRIS = tf.contrib.learn.datasets.load_iris()
+_IRIS_DATA = np.ascontiguousarray(_IRIS.data, dtype=np.float32)
+_IRIS_TARGET_2D = _IRIS.target.astype(np.int32).reshape(150, 1)
+
+
 def _prepare_iris_data_for_logistic_regression():
   # Converts iris data to a logistic regression problem.
-  iris = tf.contrib.learn.datasets.load_iris()
-  ids = np.where((iris.target == 0) | (iris.target == 1))
-  iris = tf.contrib.learn.datasets.base.Dataset(data=iris.data[ids],
-                                                target=iris.target[ids])
+  ids = _IRIS.target < 2
+  iris = tf.contrib.learn.datasets.base.Dataset(data=_IRIS.data[ids],
+                                                target=_IRIS.target[ids])
   return iris
 
 
+_IRIS_LR = _prepare_iris_data_for_logistic_regression()
+_IRIS_LR_DATA = np.ascontiguousarray(_IRIS_LR.data, dtype=np.float32)
+_IRIS_LR_TARGET_2D = _IRIS_LR.target.astype(np.int32).reshape(100, 1)
+
+
 def _iris_input_fn():
-  iris = tf.contrib.learn.datasets.load_iris()
-  return {
-      'feature': tf.constant(iris.data, dtype=tf.float32)
-  }, tf.constant(iris.target, shape=[150, 1], dtype=tf.int32)
+  return {'feature': tf.constant(_IRIS_DATA)}, tf.constant(_IRIS_TARGET_2D)
+
+
+def _fresh_temp_dir(name):
+  """Returns a new, uniquely named directory under the test temp dir.
+
+  The test temp dir is shared by every process running this file, so the
+  directory gets a unique suffix rather than being cleared and reused.
+
+  Args:
+    name: Prefix of the directory name.
+
+  Returns:
+    Path of the empty directory.
+  """
+  return tempfile.mkdtemp(prefix=name + '_', dir=tf.test.get_temp_dir())
+
+
+def _quick_loss(classifier, input_fn):
+  """Returns the loss of `classifier`'s latest checkpoint on `input_fn`.
+
+  Unlike `evaluate`, this builds no streaming metrics, summaries or eval
+  directory: it restores the checkpoint and runs the loss tensor once.
+  The loss is the model's training loss, a mean over the batch, so with a
+  weight column it differs from the weighted average `evaluate` reports.
+
+  Args:
+    classifier: A fitted `LinearClassifier`.
+    input_fn: Input function returning features and labels.
+
+  Returns:
+    The loss as a numpy scalar.
+  """
+  estimator = classifier.get_estimator()
+  with tf.Graph().as_default():
+    tf.contrib.framework.create_global_step()
+    features, labels = input_fn()
+    # pylint: disable=protected-access
+    model_fn_ops = estimator._call_model_fn(features, labels,
+                                            tf.contrib.learn.ModeKeys.EVAL)
+    # pylint: enable=protected-access
+    with tf.Session() as sess:
+      tf.train.Saver().restore(
+          sess, tf.train.latest_checkpoint(classifier.model_dir))
+      return sess.run(model_fn_ops.loss)
+
+
+class _StopAtLoss(tf.contrib.learn.monitors.EveryN):
+  """Stops training once the training loss drops below `threshold`.
+
+  Tests that only assert an upper bound on the loss of their training data use
+  this to stop well inside that bound instead of always running every step.
+  """
+
+  def __init__(self, threshold):
+    super(_StopAtLoss, self).__init__(every_n_steps=1)
+    self._threshold = threshold
+    self._loss = None
+
+  def begin(self, max_steps=None):
+    super(_StopAtLoss, self).begin(max_steps=max_steps)
+    # The estimator adds its training loss to this collection before the
+    # monitors begin.
+    self._loss = tf.get_collection(tf.GraphKeys.LOSSES)[-1]
+
+  def every_n_step_begin(self, step):
+    super(_StopAtLoss, self).every_n_step_begin(step)
+    return [self._loss]
+
+  def every_n_step_end(self, step, outputs):
+    super(_StopAtLoss, self).every_n_step_end(step, outputs)
+    return outputs[self._loss] < self._threshold
+
+
+def _iris_optimizer(optimizer_key):
+  """Returns the `optimizer` argument for the given `optimizer_key`."""
+  if optimizer_key is None:
+    return None
+  if optimizer_key == 'ftrl_object':
+    return tf.train.FtrlOptimizer(learning_rate=0.1)
+  if optimizer_key == 'ftrl_function':
+    return lambda: tf.train.FtrlOptimizer(learning_rate=0.1)
+  if optimizer_key == 'ftrl_string':
+    return 'Ftrl'
+  raise ValueError('Unknown optimizer_key: %s' % optimizer_key)
+
+
+_TRAINED_IRIS_CLASSIFIERS = {}
+
+
+def _trained_iris_classifier(n_classes, optimizer_key, steps=_STEPS['iris']):
+  """Returns a `LinearClassifier` fit on iris, trained once per configuration.
+
+  Tests that only assert on an already trained model share the returned
+  estimator, so they must not train it any further.
+
+  Args:
+    n_classes: Number of label classes.
+    optimizer_key: `None` for the default optimizer, or one of 'ftrl_object',
+      'ftrl_function' and 'ftrl_string'.
+    steps: Number of training steps.
+
+  Returns:
+    A trained `LinearClassifier`.
+  """
+  key = (n_classes, optimizer_key, steps)
+  if key not in _TRAINED_IRIS_CLASSIFIERS:
+    feature_column = tf.contrib.layers.real_valued_column('feature',
+                                                          dimension=4)
+    classifier = tf.contrib.learn.LinearClassifier(
+        n_classes=n_classes,
+        feature_columns=[feature_column],
+        optimizer=_iris_optimizer(optimizer_key),
+        model_dir=_fresh_temp_dir('iris_%s_%s_%d' % key))
+    classifier.fit(input_fn=_iris_input_fn, steps=steps)
+    _TRAINED_IRIS_CLASSIFIERS[key] = classifier
+  return _TRAINED_IRIS_CLASSIFIERS[key]
 
 
 class LinearClassifierTest(tf.test.TestCase):
@@ -58,20 +266,18 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'age': tf.constant([1]),
-          'language': tf.SparseTensor(values=['english'],
-                                      indices=[[0, 0]],
-                                      shape=[1, 1])
+          'language': tf.SparseTensor.from_value(_ENGLISH_ID_VALUE)
       }, tf.constant([[1]])
 
-    language = tf.contrib.layers.sparse_column_with_hash_bucket('language', 100)
-    age = tf.contrib.layers.real_valued_column('age')
+    language = tf.contrib.layers.sparse_column_with_integerized_feature(
+        'language', _LANGUAGE_BUCKET_SIZE)
 
     classifier = tf.contrib.learn.LinearClassifier(
-        feature_columns=[age, language])
-    classifier.fit(input_fn=input_fn, steps=100)
-    loss1 = classifier.evaluate(input_fn=input_fn, steps=1)['loss']
-    classifier.fit(input_fn=input_fn, steps=200)
-    loss2 = classifier.evaluate(input_fn=input_fn, steps=1)['loss']
+        feature_columns=[_AGE_COL, language])
+    classifier.fit(input_fn=input_fn, steps=_STEPS['train'])
+    loss1 = _quick_loss(classifier, input_fn)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['train_more'])
+    loss2 = _quick_loss(classifier, input_fn)
     self.assertLess(loss2, loss1)
     self.assertLess(loss2, 0.01)
 
@@ -80,10 +286,8 @@ class LinearClassifierTest(tf.test.TestCase):
 
     def input_fn():
       return {
-          'age': tf.SparseTensor(values=['1'], indices=[[0, 0]], shape=[1, 1]),
-          'language': tf.SparseTensor(values=['english'],
-                                      indices=[[0, 0]],
-                                      shape=[1, 1])
+          'age': tf.SparseTensor.from_value(_JOINT_AGE_VALUE),
+          'language': tf.SparseTensor.from_value(_ENGLISH_VALUE)
       }, tf.constant([[1]])
 
     language = tf.contrib.layers.sparse_column_with_hash_bucket('language', 100)
@@ -92,84 +296,55 @@ class LinearClassifierTest(tf.test.TestCase):
     classifier = tf.contrib.learn.LinearClassifier(
         _joint_weight=True,
         feature_columns=[age, language])
-    classifier.fit(input_fn=input_fn, steps=100)
-    loss1 = classifier.evaluate(input_fn=input_fn, steps=1)['loss']
-    classifier.fit(input_fn=input_fn, steps=200)
-    loss2 = classifier.evaluate(input_fn=input_fn, steps=1)['loss']
+    classifier.fit(input_fn=input_fn, steps=_STEPS['train'])
+    loss1 = _quick_loss(classifier, input_fn)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['train_more'])
+    loss2 = _quick_loss(classifier, input_fn)
     self.assertLess(loss2, loss1)
     self.assertLess(loss2, 0.01)
 
   def testMultiClass_MatrixData(self):
-    """Tests multi-class classification using matrix data as input."""
-    feature_column = tf.contrib.layers.real_valued_column('feature',
-                                                          dimension=4)
+    """Tests multi-class classification using matrix data as input.
 
-    classifier = tf.contrib.learn.LinearClassifier(
-        n_classes=3,
-        feature_columns=[feature_column])
-
-    classifier.fit(input_fn=_iris_input_fn, steps=100)
-    scores = classifier.evaluate(input_fn=_iris_input_fn, steps=100)
-    self.assertGreater(scores['accuracy'], 0.9)
-
-  def testMultiClass_MatrixData_Labels1D(self):
-    """Same as the last test, but labels shape is [150] instead of [150, 1]."""
-    def _input_fn():
-      iris = tf.contrib.learn.datasets.load_iris()
-      return {
-          'feature': tf.constant(iris.data, dtype=tf.float32)
-      }, tf.constant(iris.target, shape=[150], dtype=tf.int32)
-
-    feature_column = tf.contrib.layers.real_valued_column('feature',
-                                                          dimension=4)
-
-    classifier = tf.contrib.learn.LinearClassifier(
-        n_classes=3,
-        feature_columns=[feature_column])
+    The model is evaluated with labels of shape [150, 1] as well as [150].
+    """
+    def _input_fn_labels_1d():
+      features, labels = _iris_input_fn()
+      return features, tf.reshape(labels, [150])
 
-    classifier.fit(input_fn=_input_fn, steps=100)
-    scores = classifier.evaluate(input_fn=_input_fn, steps=1)
-    self.assertGreater(scores['accuracy'], 0.9)
+    classifier = _trained_iris_classifier(n_classes=3, optimizer_key=None)
+    for input_fn in (_iris_input_fn, _input_fn_labels_1d):
+      scores = classifier.evaluate(input_fn=input_fn, steps=1)
+      self.assertGreater(scores['accuracy'], 0.9)
 
   def testMultiClass_NpMatrixData(self):
     """Tests multi-class classification using numpy matrix data as input."""
-    iris = tf.contrib.learn.datasets.load_iris()
-    train_x = iris.data
-    train_y = iris.target
+    train_x = _IRIS.data
+    train_y = _IRIS.target
     feature_column = tf.contrib.layers.real_valued_column('', dimension=4)
     classifier = tf.contrib.learn.LinearClassifier(
         n_classes=3,
         feature_columns=[feature_column])
 
-    classifier.fit(x=train_x, y=train_y, steps=100)
+    classifier.fit(x=train_x, y=train_y, steps=_STEPS['iris'])
     scores = classifier.evaluate(x=train_x, y=train_y, steps=1)
     self.assertGreater(scores['accuracy'], 0.9)
 
   def testLogisticRegression_MatrixData(self):
-    """Tests binary classification using matrix data as input."""
+    """Tests binary classification using matrix data as input.
+
+    The model is trained once, then evaluated with labels of shape [100, 1]
+    as well as [100].
+    """
     def _input_fn():
-      iris = _prepare_iris_data_for_logistic_regression()
       return {
-          'feature': tf.constant(iris.data, dtype=tf.float32)
-      }, tf.constant(iris.target, shape=[100, 1], dtype=tf.int32)
-
-    feature_column = tf.contrib.layers.real_valued_column('feature',
-                                                          dimension=4)
-
-    classifier = tf.contrib.learn.LinearClassifier(
-        feature_columns=[feature_column])
+          'feature': tf.convert_to_tensor(_IRIS_LR_DATA)
+      }, tf.convert_to_tensor(_IRIS_LR_TARGET_2D)
 
-    classifier.fit(input_fn=_input_fn, steps=100)
-    scores = classifier.evaluate(input_fn=_input_fn, steps=1)
-    self.assertGreater(scores['accuracy'], 0.9)
-
-  def testLogisticRegression_MatrixData_Labels1D(self):
-    """Same as the last test, but labels shape is [100] instead of [100, 1]."""
-    def _input_fn():
-      iris = _prepare_iris_data_for_logistic_regression()
+    def _input_fn_labels_1d():
       return {
-          'feature': tf.constant(iris.data, dtype=tf.float32)
-      }, tf.constant(iris.target, shape=[100], dtype=tf.int32)
+          'feature': tf.convert_to_tensor(_IRIS_LR_DATA)
+      }, tf.convert_to_tensor(_IRIS_LR_TARGET_2D.reshape(100))
 
     feature_column = tf.contrib.layers.real_valued_column('feature',
                                                           dimension=4)
@@ -177,101 +352,56 @@ class LinearClassifierTest(tf.test.TestCase):
     classifier = tf.contrib.learn.LinearClassifier(
         feature_columns=[feature_column])
 
-    classifier.fit(input_fn=_input_fn, steps=100)
-    scores = classifier.evaluate(input_fn=_input_fn, steps=1)
-    self.assertGreater(scores['accuracy'], 0.9)
+    classifier.fit(input_fn=_input_fn, steps=_STEPS['iris'])
+    for input_fn in (_input_fn, _input_fn_labels_1d):
+      scores = classifier.evaluate(input_fn=input_fn, steps=1)
+      self.assertGreater(scores['accuracy'], 0.9)
 
   def testLogisticRegression_NpMatrixData(self):
     """Tests binary classification using numpy matrix data as input."""
-    iris = _prepare_iris_data_for_logistic_regression()
-    train_x = iris.data
-    train_y = iris.target
+    train_x = _IRIS_LR.data
+    train_y = _IRIS_LR.target
     feature_columns = [tf.contrib.layers.real_valued_column('', dimension=4)]
     classifier = tf.contrib.learn.LinearClassifier(
         feature_columns=feature_columns)
 
-    classifier.fit(x=train_x, y=train_y, steps=100)
+    classifier.fit(x=train_x, y=train_y, steps=_STEPS['iris'])
     scores = classifier.evaluate(x=train_x, y=train_y, steps=1)
     self.assertGreater(scores['accuracy'], 0.9)
 
   def testWeightAndBiasNames(self):
     """Tests that weight and bias names haven't changed."""
-    feature_column = tf.contrib.layers.real_valued_column('feature',
-                                                          dimension=4)
-
-    classifier = tf.contrib.learn.LinearClassifier(
-        n_classes=3,
-        feature_columns=[feature_column])
-
-    classifier.fit(input_fn=_iris_input_fn, steps=100)
+    classifier = _trained_iris_classifier(n_classes=3, optimizer_key=None)
     self.assertEqual(4, len(classifier.weights_))
     self.assertEqual(3, len(classifier.bias_))
 
-  def testCustomOptimizerByObject(self):
-    """Tests multi-class classification using matrix data as input."""
-    feature_column = tf.contrib.layers.real_valued_column('feature',
-                                                          dimension=4)
-
-    classifier = tf.contrib.learn.LinearClassifier(
-        n_classes=3,
-        optimizer=tf.train.FtrlOptimizer(learning_rate=0.1),
-        feature_columns=[feature_column])
-
-    classifier.fit(input_fn=_iris_input_fn, steps=100)
-    scores = classifier.evaluate(input_fn=_iris_input_fn, steps=100)
-    self.assertGreater(scores['accuracy'], 0.9)
-
-  def testCustomOptimizerByString(self):
-    """Tests multi-class classification using matrix data as input."""
-    feature_column = tf.contrib.layers.real_valued_column('feature',
-                                                          dimension=4)
-
-    def _optimizer():
-      return tf.train.FtrlOptimizer(learning_rate=0.1)
-
-    classifier = tf.contrib.learn.LinearClassifier(
-        n_classes=3,
-        optimizer=_optimizer,
-        feature_columns=[feature_column])
-
-    classifier.fit(input_fn=_iris_input_fn, steps=100)
-    scores = classifier.evaluate(input_fn=_iris_input_fn, steps=100)
-    self.assertGreater(scores['accuracy'], 0.9)
-
-  def testCustomOptimizerByFunction(self):
-    """Tests multi-class classification using matrix data as input."""
-    feature_column = tf.contrib.layers.real_valued_column('feature',
-                                                          dimension=4)
-
-    classifier = tf.contrib.learn.LinearClassifier(
-        n_classes=3,
-        optimizer='Ftrl',
-        feature_columns=[feature_column])
-
-    classifier.fit(input_fn=_iris_input_fn, steps=100)
-    scores = classifier.evaluate(input_fn=_iris_input_fn, steps=100)
-    self.assertGreater(scores['accuracy'], 0.9)
+  def testCustomOptimizer(self):
+    """Tests custom optimizers given as an object, a function and a string."""
+    for optimizer_key in ('ftrl_object', 'ftrl_function', 'ftrl_string'):
+      classifier = _trained_iris_classifier(
+          n_classes=3, optimizer_key=optimizer_key)
+      scores = classifier.evaluate(input_fn=_iris_input_fn, steps=1)
+      self.assertGreater(scores['accuracy'], 0.9, msg=optimizer_key)
 
   def testCustomMetrics(self):
     """Tests custom evaluation metrics."""
 
     def _input_fn(num_epochs=None):
       # Create 4 rows, one of them (y = x), three of them (y=Not(x))
-      labels = tf.constant([[1], [0], [0], [0]], dtype=tf.float32)
+      labels = tf.constant(_LABELS_4)
       features = {'x': tf.train.limit_epochs(
-          tf.ones(shape=[4, 1], dtype=tf.float32), num_epochs=num_epochs)}
+          tf.constant(_ONES_4x1), num_epochs=num_epochs)}
       return features, labels
 
     def _my_metric_op(predictions, labels):
       # For the case of binary classification, the 2nd column of "predictions"
       # denotes the model predictions.
-      predictions = tf.slice(predictions, [0, 1], [-1, 1])
-      return tf.reduce_sum(tf.mul(predictions, labels))
+      return tf.reduce_sum(predictions[:, 1:2] * labels)
 
     classifier = tf.contrib.learn.LinearClassifier(
         feature_columns=[tf.contrib.layers.real_valued_column('x')])
 
-    classifier.fit(input_fn=_input_fn, steps=100)
+    classifier.fit(input_fn=_input_fn, steps=_STEPS['default'])
     scores = classifier.evaluate(
         input_fn=_input_fn,
         steps=100,
@@ -289,7 +419,8 @@ class LinearClassifierTest(tf.test.TestCase):
         set(['loss', 'my_accuracy', 'my_precision', 'my_metric'
             ]).issubset(set(scores.keys())))
     predict_input_fn = functools.partial(_input_fn, num_epochs=1)
-    predictions = np.array(list(classifier.predict(input_fn=predict_input_fn)))
+    predictions = np.fromiter(classifier.predict(input_fn=predict_input_fn),
+                              dtype=np.int64, count=4)
     self.assertEqual(_sklearn.accuracy_score([1, 0, 0, 0], predictions),
                      scores['my_accuracy'])
 
@@ -320,12 +451,10 @@ class LinearClassifierTest(tf.test.TestCase):
               tf.constant([[1], [2]]), num_epochs=num_epochs),
       }, tf.constant([[.7], [0]], dtype=tf.float32)
 
-    age = tf.contrib.layers.real_valued_column('age')
-
     classifier = tf.contrib.learn.LinearClassifier(
-        feature_columns=[age],
+        feature_columns=[_AGE_COL],
         config=tf.contrib.learn.RunConfig(tf_random_seed=1))
-    classifier.fit(input_fn=input_fn, steps=500)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['fractional_labels'])
 
     predict_input_fn = functools.partial(input_fn, num_epochs=1)
     predictions_proba = list(
@@ -339,9 +468,7 @@ class LinearClassifierTest(tf.test.TestCase):
 
     def _input_fn():
       features = {
-          'language': tf.SparseTensor(values=['en', 'fr', 'zh'],
-                                      indices=[[0, 0], [0, 1], [2, 0]],
-                                      shape=[3, 2])
+          'language': tf.SparseTensor.from_value(_LANGUAGE_VALUE)
       }
       labels = tf.constant([[1], [0], [0]])
       return features, labels
@@ -360,7 +487,8 @@ class LinearClassifierTest(tf.test.TestCase):
         # distributed jobs, such as "/job:ps" which are not present.
         config=tf.contrib.learn.RunConfig(
             num_ps_replicas=2, cluster_spec=tf.train.ClusterSpec({})))
-    classifier.fit(input_fn=_input_fn, steps=200)
+    classifier.fit(input_fn=_input_fn, steps=_STEPS['partitioned_variables'],
+                   monitors=[_StopAtLoss(0.035)])
     loss = classifier.evaluate(input_fn=_input_fn, steps=1)['loss']
     self.assertLess(loss, 0.07)
 
@@ -370,32 +498,28 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn(num_epochs=None):
       return {
           'age': tf.train.limit_epochs(tf.constant([1]), num_epochs=num_epochs),
-          'language': tf.SparseTensor(
-              values=['english'], indices=[[0, 0]], shape=[1, 1]),
+          'language': tf.SparseTensor.from_value(_ENGLISH_VALUE),
       }, tf.constant([[1]])
 
-    language = tf.contrib.layers.sparse_column_with_hash_bucket('language', 100)
-    age = tf.contrib.layers.real_valued_column('age')
-
-    model_dir = tempfile.mkdtemp()
+    model_dir = _fresh_temp_dir('classifier_saveload')
     classifier = tf.contrib.learn.LinearClassifier(
         model_dir=model_dir,
-        feature_columns=[age, language])
-    classifier.fit(input_fn=input_fn, steps=30)
+        feature_columns=[_AGE_COL, _LANGUAGE_COL])
+    classifier.fit(input_fn=input_fn, steps=_STEPS['save_load'])
     predict_input_fn = functools.partial(input_fn, num_epochs=1)
-    out1_class = list(classifier.predict(input_fn=predict_input_fn,
-                                         as_iterable=True))
-    out1_proba = list(classifier.predict_proba(input_fn=predict_input_fn,
-                                               as_iterable=True))
+    out1_class = classifier.predict(input_fn=predict_input_fn,
+                                    as_iterable=False)
+    out1_proba = classifier.predict_proba(input_fn=predict_input_fn,
+                                          as_iterable=False)
     del classifier
 
     classifier2 = tf.contrib.learn.LinearClassifier(
         model_dir=model_dir,
-        feature_columns=[age, language])
-    out2_class = list(classifier2.predict(input_fn=predict_input_fn,
-                                          as_iterable=True))
-    out2_proba = list(classifier2.predict_proba(input_fn=predict_input_fn,
-                                                as_iterable=True))
+        feature_columns=[_AGE_COL, _LANGUAGE_COL])
+    out2_class = classifier2.predict(input_fn=predict_input_fn,
+                                     as_iterable=False)
+    out2_proba = classifier2.predict_proba(input_fn=predict_input_fn,
+                                           as_iterable=False)
     self.assertTrue(np.array_equal(out1_class, out2_class))
     self.assertTrue(np.array_equal(out1_proba, out2_proba))
 
@@ -408,7 +532,7 @@ class LinearClassifierTest(tf.test.TestCase):
       # than (y=Not(x)) due to the relative higher weight of the first row.
       labels = tf.constant([[1], [0], [0], [0]])
       features = {
-          'x': tf.ones(shape=[4, 1], dtype=tf.float32),
+          'x': tf.constant(_ONES_4x1),
           'w': tf.constant([[100.], [3.], [2.], [2.]])
       }
       return features, labels
@@ -417,8 +541,8 @@ class LinearClassifierTest(tf.test.TestCase):
       # Create 4 rows (y = x)
       labels = tf.constant([[1], [1], [1], [1]])
       features = {
-          'x': tf.ones(shape=[4, 1], dtype=tf.float32),
-          'w': tf.constant([[1.], [1.], [1.], [1.]])
+          'x': tf.constant(_ONES_4x1),
+          'w': tf.constant(_ONES_4x1)
       }
       return features, labels
 
@@ -427,7 +551,7 @@ class LinearClassifierTest(tf.test.TestCase):
         feature_columns=[tf.contrib.layers.real_valued_column('x')],
         config=tf.contrib.learn.RunConfig(tf_random_seed=3))
 
-    classifier.fit(input_fn=_input_fn_train, steps=100)
+    classifier.fit(input_fn=_input_fn_train, steps=_STEPS['default'])
     scores = classifier.evaluate(input_fn=_input_fn_eval, steps=1)
     # All examples in eval data set are y=x.
     self.assertGreater(scores['labels/actual_label_mean'], 0.9)
@@ -459,17 +583,15 @@ class LinearClassifierTest(tf.test.TestCase):
       labels = tf.constant([[1], [0], [0]])
       return features, labels
 
-    age = tf.contrib.layers.real_valued_column('age')
-
     classifier = tf.contrib.learn.LinearClassifier(
-        feature_columns=[age])
-    classifier.fit(input_fn=_input_fn, steps=100)
+        feature_columns=[_AGE_COL])
+    classifier.fit(input_fn=_input_fn, steps=_STEPS['default'])
     loss_unweighted = classifier.evaluate(input_fn=_input_fn, steps=1)['loss']
 
     classifier = tf.contrib.learn.LinearClassifier(
-        feature_columns=[age],
+        feature_columns=[_AGE_COL],
         weight_column_name='weights')
-    classifier.fit(input_fn=_input_fn, steps=100)
+    classifier.fit(input_fn=_input_fn, steps=_STEPS['default'])
     loss_weighted = classifier.evaluate(input_fn=_input_fn, steps=1)['loss']
 
     self.assertLess(loss_weighted, loss_unweighted)
@@ -480,19 +602,14 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'age': tf.constant([1]),
-          'language': tf.SparseTensor(values=['english'],
-                                      indices=[[0, 0]],
-                                      shape=[1, 1])
+          'language': tf.SparseTensor.from_value(_ENGLISH_VALUE)
       }, tf.constant([[1]])
 
-    language = tf.contrib.layers.sparse_column_with_hash_bucket('language', 100)
-    age = tf.contrib.layers.real_valued_column('age')
-
     classifier = tf.contrib.learn.LinearClassifier(
-        feature_columns=[age, language])
-    classifier.fit(input_fn=input_fn, steps=100)
+        feature_columns=[_AGE_COL, _LANGUAGE_COL])
+    classifier.fit(input_fn=input_fn, steps=_STEPS['structural'])
 
-    export_dir = tempfile.mkdtemp()
+    export_dir = _fresh_temp_dir('classifier_export')
     classifier.export(export_dir)
 
   def testDisableCenteredBias(self):
@@ -501,17 +618,12 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'age': tf.constant([1]),
-          'language': tf.SparseTensor(values=['english'],
-                                      indices=[[0, 0]],
-                                      shape=[1, 1])
+          'language': tf.SparseTensor.from_value(_ENGLISH_VALUE)
       }, tf.constant([[1]])
 
-    language = tf.contrib.layers.sparse_column_with_hash_bucket('language', 100)
-    age = tf.contrib.layers.real_valued_column('age')
-
     classifier = tf.contrib.learn.LinearClassifier(
-        feature_columns=[age, language], enable_centered_bias=False)
-    classifier.fit(input_fn=input_fn, steps=100)
+        feature_columns=[_AGE_COL, _LANGUAGE_COL], enable_centered_bias=False)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['structural'])
     self.assertFalse('centered_bias_weight' in classifier.get_variable_names())
 
   def testEnableCenteredBias(self):
@@ -520,17 +632,12 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'age': tf.constant([1]),
-          'language': tf.SparseTensor(values=['english'],
-                                      indices=[[0, 0]],
-                                      shape=[1, 1])
+          'language': tf.SparseTensor.from_value(_ENGLISH_VALUE)
       }, tf.constant([[1]])
 
-    language = tf.contrib.layers.sparse_column_with_hash_bucket('language', 100)
-    age = tf.contrib.layers.real_valued_column('age')
-
     classifier = tf.contrib.learn.LinearClassifier(
-        feature_columns=[age, language], enable_centered_bias=True)
-    classifier.fit(input_fn=input_fn, steps=100)
+        feature_columns=[_AGE_COL, _LANGUAGE_COL], enable_centered_bias=True)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['structural'])
     self.assertTrue('centered_bias_weight' in classifier.get_variable_names())
 
   def testTrainOptimizerWithL1Reg(self):
@@ -538,24 +645,21 @@ class LinearClassifierTest(tf.test.TestCase):
 
     def input_fn():
       return {
-          'language': tf.SparseTensor(values=['hindi'],
-                                      indices=[[0, 0]],
-                                      shape=[1, 1])
+          'language': tf.SparseTensor.from_value(_HINDI_ID_VALUE)
       }, tf.constant([[1]])
 
-    language = tf.contrib.layers.sparse_column_with_hash_bucket('language', 100)
+    language = tf.contrib.layers.sparse_column_with_integerized_feature(
+        'language', _LANGUAGE_BUCKET_SIZE)
     classifier_no_reg = tf.contrib.learn.LinearClassifier(
         feature_columns=[language])
     classifier_with_reg = tf.contrib.learn.LinearClassifier(
         feature_columns=[language],
         optimizer=tf.train.FtrlOptimizer(learning_rate=1.0,
                                          l1_regularization_strength=100.))
-    loss_no_reg = classifier_no_reg.fit(
-        input_fn=input_fn, steps=100).evaluate(
-            input_fn=input_fn, steps=1)['loss']
-    loss_with_reg = classifier_with_reg.fit(
-        input_fn=input_fn, steps=100).evaluate(
-            input_fn=input_fn, steps=1)['loss']
+    classifier_no_reg.fit(input_fn=input_fn, steps=_STEPS['default'])
+    loss_no_reg = _quick_loss(classifier_no_reg, input_fn)
+    classifier_with_reg.fit(input_fn=input_fn, steps=_STEPS['default'])
+    loss_with_reg = _quick_loss(classifier_with_reg, input_fn)
     self.assertLess(loss_no_reg, loss_with_reg)
 
   def testTrainWithMissingFeature(self):
@@ -563,14 +667,13 @@ class LinearClassifierTest(tf.test.TestCase):
 
     def input_fn():
       return {
-          'language': tf.SparseTensor(values=['Swahili', 'turkish'],
-                                      indices=[[0, 0], [2, 0]],
-                                      shape=[3, 1])
+          'language': tf.SparseTensor.from_value(_MISSING_LANGUAGE_VALUE)
       }, tf.constant([[1], [1], [1]])
 
-    language = tf.contrib.layers.sparse_column_with_hash_bucket('language', 100)
-    classifier = tf.contrib.learn.LinearClassifier(feature_columns=[language])
-    classifier.fit(input_fn=input_fn, steps=100)
+    classifier = tf.contrib.learn.LinearClassifier(
+        feature_columns=[_LANGUAGE_COL])
+    classifier.fit(input_fn=input_fn, steps=_STEPS['default'],
+                   monitors=[_StopAtLoss(0.035)])
     loss = classifier.evaluate(input_fn=input_fn, steps=1)['loss']
     self.assertLess(loss, 0.07)
 
@@ -580,9 +683,10 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'example_id': tf.constant(['1', '2']),
-          'maintenance_cost': tf.constant([[500.0], [200.0]]),
-          'sq_footage': tf.constant([[800.0], [600.0]]),
-          'weights': tf.constant([[1.0], [1.0]])
+          'maintenance_cost': tf.constant([[500.0], [200.0]],
+                                          dtype=tf.float32),
+          'sq_footage': tf.constant([[800.0], [600.0]], dtype=tf.float32),
+          'weights': tf.constant([[1.0], [1.0]], dtype=tf.float32)
       }, tf.constant([[0], [1]])
 
     maintenance_cost = tf.contrib.layers.real_valued_column('maintenance_cost')
@@ -593,7 +697,7 @@ class LinearClassifierTest(tf.test.TestCase):
         feature_columns=[maintenance_cost, sq_footage],
         weight_column_name='weights',
         optimizer=sdca_optimizer)
-    classifier.fit(input_fn=input_fn, steps=100)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['sdca_real_valued'])
     loss = classifier.evaluate(input_fn=input_fn, steps=1)['loss']
     self.assertLess(loss, 0.05)
 
@@ -606,7 +710,8 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'example_id': tf.constant(['1', '2']),
-          'dense_feature': tf.constant([[500.0, 800.0], [200.0, 600.0]])
+          'dense_feature': tf.constant([[500.0, 800.0], [200.0, 600.0]],
+                                       dtype=tf.float32)
       }, tf.constant([[0], [1]])
 
     dense_feature = tf.contrib.layers.real_valued_column(
@@ -615,7 +720,7 @@ class LinearClassifierTest(tf.test.TestCase):
         example_id_column='example_id')
     classifier = tf.contrib.learn.LinearClassifier(
         feature_columns=[dense_feature], optimizer=sdca_optimizer)
-    classifier.fit(input_fn=input_fn, steps=100)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['sdca_real_valued'])
     loss = classifier.evaluate(input_fn=input_fn, steps=1)['loss']
     self.assertLess(loss, 0.05)
 
@@ -625,9 +730,10 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'example_id': tf.constant(['1', '2', '3']),
-          'price': tf.constant([[600.0], [1000.0], [400.0]]),
-          'sq_footage': tf.constant([[1000.0], [600.0], [700.0]]),
-          'weights': tf.constant([[1.0], [1.0], [1.0]])
+          'price': tf.constant([[600.0], [1000.0], [400.0]], dtype=tf.float32),
+          'sq_footage': tf.constant([[1000.0], [600.0], [700.0]],
+                                    dtype=tf.float32),
+          'weights': tf.constant([[1.0], [1.0], [1.0]], dtype=tf.float32)
       }, tf.constant([[1], [0], [1]])
 
     price_bucket = tf.contrib.layers.bucketized_column(
@@ -643,7 +749,7 @@ class LinearClassifierTest(tf.test.TestCase):
         feature_columns=[price_bucket, sq_footage_bucket],
         weight_column_name='weights',
         optimizer=sdca_optimizer)
-    classifier.fit(input_fn=input_fn, steps=50)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['sdca_categorical'])
     scores = classifier.evaluate(input_fn=input_fn, steps=1)
     self.assertGreater(scores['accuracy'], 0.9)
 
@@ -653,11 +759,9 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'example_id': tf.constant(['1', '2', '3']),
-          'price': tf.constant([[0.4], [0.6], [0.3]]),
-          'country': tf.SparseTensor(values=['IT', 'US', 'GB'],
-                                     indices=[[0, 0], [1, 3], [2, 1]],
-                                     shape=[3, 5]),
-          'weights': tf.constant([[1.0], [1.0], [1.0]])
+          'price': tf.constant([[0.4], [0.6], [0.3]], dtype=tf.float32),
+          'country': tf.SparseTensor.from_value(_COUNTRY_VALUE),
+          'weights': tf.constant([[1.0], [1.0], [1.0]], dtype=tf.float32)
       }, tf.constant([[1], [0], [1]])
 
     price = tf.contrib.layers.real_valued_column('price')
@@ -669,7 +773,7 @@ class LinearClassifierTest(tf.test.TestCase):
         feature_columns=[price, country],
         weight_column_name='weights',
         optimizer=sdca_optimizer)
-    classifier.fit(input_fn=input_fn, steps=50)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['sdca_categorical'])
     scores = classifier.evaluate(input_fn=input_fn, steps=1)
     self.assertGreater(scores['accuracy'], 0.9)
 
@@ -679,12 +783,8 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'example_id': tf.constant(['1', '2', '3']),
-          'price': tf.SparseTensor(values=[2., 3., 1.],
-                                   indices=[[0, 0], [1, 0], [2, 0]],
-                                   shape=[3, 5]),
-          'country': tf.SparseTensor(values=['IT', 'US', 'GB'],
-                                     indices=[[0, 0], [1, 0], [2, 0]],
-                                     shape=[3, 5])
+          'price': tf.SparseTensor.from_value(_WEIGHTED_PRICE_VALUE),
+          'country': tf.SparseTensor.from_value(_WEIGHTED_COUNTRY_VALUE)
       }, tf.constant([[1], [0], [1]])
 
     country = tf.contrib.layers.sparse_column_with_hash_bucket(
@@ -696,7 +796,7 @@ class LinearClassifierTest(tf.test.TestCase):
     classifier = tf.contrib.learn.LinearClassifier(
         feature_columns=[country_weighted_by_price],
         optimizer=sdca_optimizer)
-    classifier.fit(input_fn=input_fn, steps=50)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['sdca_categorical'])
     scores = classifier.evaluate(input_fn=input_fn, steps=1)
     self.assertGreater(scores['accuracy'], 0.9)
 
@@ -706,12 +806,8 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'example_id': tf.constant(['1', '2', '3']),
-          'language': tf.SparseTensor(values=['english', 'italian', 'spanish'],
-                                      indices=[[0, 0], [1, 0], [2, 0]],
-                                      shape=[3, 1]),
-          'country': tf.SparseTensor(values=['US', 'IT', 'MX'],
-                                     indices=[[0, 0], [1, 0], [2, 0]],
-                                     shape=[3, 1])
+          'language': tf.SparseTensor.from_value(_CROSSED_LANGUAGE_VALUE),
+          'country': tf.SparseTensor.from_value(_CROSSED_COUNTRY_VALUE)
       }, tf.constant([[0], [0], [1]])
 
     language = tf.contrib.layers.sparse_column_with_hash_bucket(
@@ -725,7 +821,7 @@ class LinearClassifierTest(tf.test.TestCase):
     classifier = tf.contrib.learn.LinearClassifier(
         feature_columns=[country_language],
         optimizer=sdca_optimizer)
-    classifier.fit(input_fn=input_fn, steps=10)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['sdca_crossed'])
     scores = classifier.evaluate(input_fn=input_fn, steps=1)
     self.assertGreater(scores['accuracy'], 0.9)
 
@@ -735,12 +831,11 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'example_id': tf.constant(['1', '2', '3']),
-          'price': tf.constant([[0.6], [0.8], [0.3]]),
-          'sq_footage': tf.constant([[900.0], [700.0], [600.0]]),
-          'country': tf.SparseTensor(values=['IT', 'US', 'GB'],
-                                     indices=[[0, 0], [1, 3], [2, 1]],
-                                     shape=[3, 5]),
-          'weights': tf.constant([[3.0], [1.0], [1.0]])
+          'price': tf.constant([[0.6], [0.8], [0.3]], dtype=tf.float32),
+          'sq_footage': tf.constant([[900.0], [700.0], [600.0]],
+                                    dtype=tf.float32),
+          'country': tf.SparseTensor.from_value(_COUNTRY_VALUE),
+          'weights': tf.constant([[3.0], [1.0], [1.0]], dtype=tf.float32)
       }, tf.constant([[1], [0], [1]])
 
     price = tf.contrib.layers.real_valued_column('price')
@@ -758,7 +853,7 @@ class LinearClassifierTest(tf.test.TestCase):
         feature_columns=[price, sq_footage_bucket, country, sq_footage_country],
         weight_column_name='weights',
         optimizer=sdca_optimizer)
-    classifier.fit(input_fn=input_fn, steps=50)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['sdca_categorical'])
     scores = classifier.evaluate(input_fn=input_fn, steps=1)
     self.assertGreater(scores['accuracy'], 0.9)
 
@@ -769,18 +864,14 @@ class LinearClassifierTest(tf.test.TestCase):
     def input_fn():
       return {
           'age': tf.constant([[1], [2]]),
-          'language': tf.SparseTensor(values=['greek', 'chinese'],
-                                      indices=[[0, 0], [1, 0]],
-                                      shape=[2, 1]),
+          'language': tf.SparseTensor.from_value(_EVAL_LANGUAGE_VALUE),
       }, tf.constant([[1], [0]])
 
-    language = tf.contrib.layers.sparse_column_with_hash_bucket('language', 100)
-    age = tf.contrib.layers.real_valued_column('age')
     classifier = tf.contrib.learn.LinearClassifier(
-        feature_columns=[age, language])
+        feature_columns=[_AGE_COL, _LANGUAGE_COL])
 
     # Evaluate on trained model
-    classifier.fit(input_fn=input_fn, steps=100)
+    classifier.fit(input_fn=input_fn, steps=_STEPS['structural'])
     classifier.evaluate(input_fn=input_fn, steps=1)
 
     # TODO(ispir): Enable accuracy check after resolving the randomness issue.
@@ -788,8 +879,109 @@ class LinearClassifierTest(tf.test.TestCase):
     # self.assertGreater(evaluated_values['accuracy/mean'], .95)
 
 
+_REGRESSION_AGE = np.array([[0.8], [0.15], [0.]], dtype=np.float32)
+_LABELS_3 = np.array([1.0, 0., 0.2], dtype=np.float32)
+
+
+def _regression_input_fn(num_epochs=None):
+  """Input for the 3 example 'age' and 'language' regression problem."""
+  features = {
+      'age': tf.train.limit_epochs(tf.constant(_REGRESSION_AGE),
+                                   num_epochs=num_epochs),
+      'language': tf.SparseTensor.from_value(_LANGUAGE_VALUE)
+  }
+  return features, tf.constant(_LABELS_3)
+
+
+_REGRESSION_FEATURE_COLUMNS = [
+    tf.contrib.layers.sparse_column_with_hash_bucket('language',
+                                                     hash_bucket_size=20),
+    _AGE_COL
+]
+
+
+def _x_input_fn(num_epochs=None):
+  # Create 4 rows, one of them (y = x), three of them (y=Not(x))
+  # The algorithm should learn (y = 0.25).
+  labels = tf.constant(_LABELS_4)
+  features = {'x': tf.train.limit_epochs(
+      tf.constant(_ONES_4x1), num_epochs=num_epochs)}
+  return features, labels
+
+
+# Inputs for the 200 example SDCA bias tests: the first half of the examples
+# have feature 'a', the second half feature 'b'. Both features are packed as
+# the columns of a single array.
+_SDCA_HALF = 100
+_SDCA_AB = np.repeat(np.array([[1, 0], [0, 1]], dtype=np.int32), _SDCA_HALF,
+                     axis=0)
+_SDCA_LABELS = np.concatenate([
+    np.tile(np.array([1, 0, 0, 1, 1, 0, 0, 0, 1, 0], dtype=np.int32),
+            _SDCA_HALF // 10),
+    np.tile(np.array([0, 1, 0, 0, 0, 0, 0, 0, 1, 0], dtype=np.int32),
+            _SDCA_HALF // 10)]).reshape(-1, 1)
+_SDCA_CENTERED_LABELS = np.concatenate([
+    np.tile(np.array([1, 0, 0, 0, 0, 0, 0, 0, 0, 0], dtype=np.int32),
+            _SDCA_HALF // 10),
+    np.tile(np.array([-1, 0, 0, 0, 0, 0, 0, 0, 0, 0], dtype=np.int32),
+            _SDCA_HALF // 10)]).reshape(-1, 1)
+
+
+def _dense_cross(first_ids, second_ids, second_size):
+  """Returns the collision free cross of two per-example id vectors.
+
+  Args:
+    first_ids: int64 array with one id per example.
+    second_ids: int64 array with one id in [0, second_size) per example.
+    second_size: Number of distinct ids in `second_ids`.
+
+  Returns:
+    A [num_examples, 1] `SparseTensorValue` holding one crossed id per example.
+  """
+  num_examples = len(first_ids)
+  return tf.SparseTensorValue(
+      indices=np.stack([np.arange(num_examples, dtype=np.int64),
+                        np.zeros(num_examples, dtype=np.int64)], axis=1),
+      values=first_ids * second_size + second_ids,
+      shape=np.array([num_examples, 1], dtype=np.int64))
+
+
+_SQ_FOOTAGE = np.array([[900.0], [700.0], [600.0]], dtype=np.float32)
+_SQ_FOOTAGE_BOUNDARIES = [650.0, 800.0]
+# np.digitize buckets values into [lo, hi) ranges, as Bucketize does.
+_SQ_FOOTAGE_BUCKETS = np.digitize(
+    _SQ_FOOTAGE[:, 0], _SQ_FOOTAGE_BOUNDARIES).astype(np.int64)
+_COUNTRIES, _COUNTRY_IDS = np.unique(_COUNTRY_VALUE.values,
+                                     return_inverse=True)
+_SQ_FOOTAGE_COUNTRY_VALUE = _dense_cross(_SQ_FOOTAGE_BUCKETS,
+                                         _COUNTRY_IDS.astype(np.int64),
+                                         len(_COUNTRIES))
+
+
 class LinearRegressorTest(tf.test.TestCase):
 
+  @classmethod
+  def setUpClass(cls):
+    super(LinearRegressorTest, cls).setUpClass()
+    # Tests that only evaluate or predict share these models, so they must not
+    # train them any further.
+    cls._model_dir = _fresh_temp_dir('linear_regressor_test')
+    cls._regressor = tf.contrib.learn.LinearRegressor(
+        feature_columns=_REGRESSION_FEATURE_COLUMNS,
+        model_dir=os.path.join(cls._model_dir, 'age_language'),
+        config=tf.contrib.learn.RunConfig(tf_random_seed=1))
+    cls._regressor.fit(input_fn=_regression_input_fn, steps=100)
+    cls._x_regressor = tf.contrib.learn.LinearRegressor(
+        feature_columns=[tf.contrib.layers.real_valued_column('x')],
+        model_dir=os.path.join(cls._model_dir, 'x'),
+        config=tf.contrib.learn.RunConfig(tf_random_seed=1))
+    cls._x_regressor.fit(input_fn=_x_input_fn, steps=100)
+
+  @classmethod
+  def tearDownClass(cls):
+    tf.gfile.DeleteRecursively(cls._model_dir)
+    super(LinearRegressorTest, cls).tearDownClass()
+
   def testEstimatorContract(self):
     estimator_test_utils.assert_estimator_contract(
         self, tf.contrib.learn.LinearRegressor)
@@ -800,16 +992,11 @@ class LinearRegressorTest(tf.test.TestCase):
     def input_fn():
       return {
           'age': tf.constant([1]),
-          'language': tf.SparseTensor(values=['english'],
-                                      indices=[[0, 0]],
-                                      shape=[1, 1])
+          'language': tf.SparseTensor.from_value(_ENGLISH_VALUE)
       }, tf.constant([[10.]])
 
-    language = tf.contrib.layers.sparse_column_with_hash_bucket('language', 100)
-    age = tf.contrib.layers.real_valued_column('age')
-
     classifier = tf.contrib.learn.LinearRegressor(
-        feature_columns=[age, language])
+        feature_columns=[_AGE_COL, _LANGUAGE_COL])
     classifier.fit(input_fn=input_fn, steps=100)
     loss1 = classifier.evaluate(input_fn=input_fn, steps=1)['loss']
     classifier.fit(input_fn=input_fn, steps=200)
@@ -833,49 +1020,13 @@ class LinearRegressorTest(tf.test.TestCase):
 
   def testRegression_TensorData(self):
     """Tests regression using tensor data as input."""
-    def _input_fn(num_epochs=None):
-      features = {
-          'age': tf.train.limit_epochs(tf.constant([[0.8], [0.15], [0.]]),
-                                       num_epochs=num_epochs),
-          'language': tf.SparseTensor(values=['en', 'fr', 'zh'],
-                                      indices=[[0, 0], [0, 1], [2, 0]],
-                                      shape=[3, 2])
-      }
-      return features, tf.constant([1.0, 0., 0.2], dtype=tf.float32)
-
-    feature_columns = [
-        tf.contrib.layers.sparse_column_with_hash_bucket('language',
-                                                         hash_bucket_size=20),
-        tf.contrib.layers.real_valued_column('age')
-    ]
-
-    regressor = tf.contrib.learn.LinearRegressor(
-        feature_columns=feature_columns,
-        config=tf.contrib.learn.RunConfig(tf_random_seed=1))
-
-    regressor.fit(input_fn=_input_fn, steps=100)
-
-    scores = regressor.evaluate(input_fn=_input_fn, steps=1)
+    regressor = self._regressor
+    scores = regressor.evaluate(input_fn=_regression_input_fn, steps=1)
     self.assertLess(scores['loss'], 0.2)
 
   def testLoss(self):
     """Tests loss calculation."""
-
-    def _input_fn_train():
-      # Create 4 rows, one of them (y = x), three of them (y=Not(x))
-      # The algorithm should learn (y = 0.25).
-      labels = tf.constant([[1.], [0.], [0.], [0.]])
-      features = {
-          'x': tf.ones(shape=[4, 1], dtype=tf.float32),
-      }
-      return features, labels
-
-    regressor = tf.contrib.learn.LinearRegressor(
-        feature_columns=[tf.contrib.layers.real_valued_column('x')],
-        config=tf.contrib.learn.RunConfig(tf_random_seed=1))
-
-    regressor.fit(input_fn=_input_fn_train, steps=100)
-    scores = regressor.evaluate(input_fn=_input_fn_train, steps=1)
+    scores = self._x_regressor.evaluate(input_fn=_x_input_fn, steps=1)
     # Average square loss = (0.75^2 + 3*0.25^2) / 4 = 0.1875
     self.assertAlmostEqual(0.1875, scores['loss'], delta=0.1)
 
@@ -885,18 +1036,18 @@ class LinearRegressorTest(tf.test.TestCase):
     def _input_fn_train():
       # 4 rows with equal weight, one of them (y = x), three of them (y=Not(x))
       # The algorithm should learn (y = 0.25).
-      labels = tf.constant([[1.], [0.], [0.], [0.]])
+      labels = tf.constant(_LABELS_4)
       features = {
-          'x': tf.ones(shape=[4, 1], dtype=tf.float32),
-          'w': tf.constant([[1.], [1.], [1.], [1.]])
+          'x': tf.constant(_ONES_4x1),
+          'w': tf.constant(_ONES_4x1)
       }
       return features, labels
 
     def _input_fn_eval():
       # 4 rows, with different weights.
-      labels = tf.constant([[1.], [0.], [0.], [0.]])
+      labels = tf.constant(_LABELS_4)
       features = {
-          'x': tf.ones(shape=[4, 1], dtype=tf.float32),
+          'x': tf.constant(_ONES_4x1),
           'w': tf.constant([[7.], [1.], [1.], [1.]])
       }
       return features, labels
@@ -918,9 +1069,9 @@ class LinearRegressorTest(tf.test.TestCase):
       # Create 4 rows, one of them (y = x), three of them (y=Not(x))
       # First row has more weight than others. Model should fit (y=x) better
       # than (y=Not(x)) due to the relative higher weight of the first row.
-      labels = tf.constant([[1.], [0.], [0.], [0.]])
+      labels = tf.constant(_LABELS_4)
       features = {
-          'x': tf.ones(shape=[4, 1], dtype=tf.float32),
+          'x': tf.constant(_ONES_4x1),
           'w': tf.constant([[100.], [3.], [2.], [2.]])
       }
       return features, labels
@@ -929,8 +1080,8 @@ class LinearRegressorTest(tf.test.TestCase):
       # Create 4 rows (y = x)
       labels = tf.constant([[1.], [1.], [1.], [1.]])
       features = {
-          'x': tf.ones(shape=[4, 1], dtype=tf.float32),
-          'w': tf.constant([[1.], [1.], [1.], [1.]])
+          'x': tf.constant(_ONES_4x1),
+          'w': tf.constant(_ONES_4x1)
       }
       return features, labels
 
@@ -947,85 +1098,33 @@ class LinearRegressorTest(tf.test.TestCase):
 
   def testPredict_AsIterableFalse(self):
     """Tests predict method with as_iterable=False."""
-    labels = [1.0, 0., 0.2]
-    def _input_fn(num_epochs=None):
-      features = {
-          'age': tf.train.limit_epochs(tf.constant([[0.8], [0.15], [0.]]),
-                                       num_epochs=num_epochs),
-          'language': tf.SparseTensor(values=['en', 'fr', 'zh'],
-                                      indices=[[0, 0], [0, 1], [2, 0]],
-                                      shape=[3, 2])
-      }
-      return features, tf.constant(labels, dtype=tf.float32)
-
-    feature_columns = [
-        tf.contrib.layers.sparse_column_with_hash_bucket('language',
-                                                         hash_bucket_size=20),
-        tf.contrib.layers.real_valued_column('age')
-    ]
-
-    regressor = tf.contrib.learn.LinearRegressor(
-        feature_columns=feature_columns,
-        config=tf.contrib.learn.RunConfig(tf_random_seed=1))
-
-    regressor.fit(input_fn=_input_fn, steps=100)
-
-    scores = regressor.evaluate(input_fn=_input_fn, steps=1)
+    regressor = self._regressor
+    scores = regressor.evaluate(input_fn=_regression_input_fn, steps=1)
     self.assertLess(scores['loss'], 0.1)
-    predictions = regressor.predict(input_fn=_input_fn, as_iterable=False)
-    self.assertAllClose(labels, predictions, atol=0.1)
+    predictions = regressor.predict(input_fn=_regression_input_fn,
+                                    as_iterable=False)
+    self.assertAllClose(_LABELS_3, predictions, atol=0.1)
 
   def testPredict_AsIterable(self):
     """Tests predict method with as_iterable=True."""
-    labels = [1.0, 0., 0.2]
-    def _input_fn(num_epochs=None):
-      features = {
-          'age': tf.train.limit_epochs(tf.constant([[0.8], [0.15], [0.]]),
-                                       num_epochs=num_epochs),
-          'language': tf.SparseTensor(values=['en', 'fr', 'zh'],
-                                      indices=[[0, 0], [0, 1], [2, 0]],
-                                      shape=[3, 2])
-      }
-      return features, tf.constant(labels, dtype=tf.float32)
-
-    feature_columns = [
-        tf.contrib.layers.sparse_column_with_hash_bucket('language',
-                                                         hash_bucket_size=20),
-        tf.contrib.layers.real_valued_column('age')
-    ]
-
-    regressor = tf.contrib.learn.LinearRegressor(
-        feature_columns=feature_columns,
-        config=tf.contrib.learn.RunConfig(tf_random_seed=1))
-
-    regressor.fit(input_fn=_input_fn, steps=100)
-
-    scores = regressor.evaluate(input_fn=_input_fn, steps=1)
+    regressor = self._regressor
+    scores = regressor.evaluate(input_fn=_regression_input_fn, steps=1)
     self.assertLess(scores['loss'], 0.1)
-    predict_input_fn = functools.partial(_input_fn, num_epochs=1)
+    predict_input_fn = functools.partial(_regression_input_fn, num_epochs=1)
     predictions = list(
         regressor.predict(input_fn=predict_input_fn, as_iterable=True))
-    self.assertAllClose(labels, predictions, atol=0.1)
+    self.assertAllClose(_LABELS_3, predictions, atol=0.1)
 
   def testCustomMetrics(self):
     """Tests custom evaluation metrics."""
-    def _input_fn(num_epochs=None):
-      # Create 4 rows, one of them (y = x), three of them (y=Not(x))
-      labels = tf.constant([[1.], [0.], [0.], [0.]])
-      features = {'x': tf.train.limit_epochs(
-          tf.ones(shape=[4, 1], dtype=tf.float32), num_epochs=num_epochs)}
-      return features, labels
-
     def _my_metric_op(predictions, labels):
-      return tf.reduce_sum(tf.mul(predictions, labels))
-
-    regressor = tf.contrib.learn.LinearRegressor(
-        feature_columns=[tf.contrib.layers.real_valued_column('x')],
-        config=tf.contrib.learn.RunConfig(tf_random_seed=1))
+      # Predictions are [batch] and labels [batch, 1]: a [1, batch] x
+      # [batch, 1] matmul takes their dot product in one kernel.
+      return tf.reduce_sum(tf.matmul(tf.expand_dims(predictions, 0), labels))
 
-    regressor.fit(input_fn=_input_fn, steps=100)
+    regressor = self._x_regressor
     scores = regressor.evaluate(
-        input_fn=_input_fn,
+        input_fn=_x_input_fn,
         steps=1,
         metrics={
             'my_error': tf.contrib.metrics.streaming_mean_squared_error,
@@ -1034,8 +1133,7 @@ class LinearRegressorTest(tf.test.TestCase):
     self.assertIn('loss', set(scores.keys()))
     self.assertIn('my_error', set(scores.keys()))
     self.assertIn('my_metric', set(scores.keys()))
-    predict_input_fn = functools.partial(_input_fn, num_epochs=1)
-    predictions = np.array(list(regressor.predict(input_fn=predict_input_fn)))
+    predictions = regressor.predict(input_fn=_x_input_fn, as_iterable=False)
     self.assertAlmostEqual(
         _sklearn.mean_squared_error(np.array([1, 0, 0, 0]), predictions),
         scores['my_error'])
@@ -1043,58 +1141,35 @@ class LinearRegressorTest(tf.test.TestCase):
     # Tests that when the key is a tuple, an error is raised.
     with self.assertRaises(KeyError):
       regressor.evaluate(
-          input_fn=_input_fn,
+          input_fn=_x_input_fn,
           steps=1,
           metrics={('my_error', 'predictions'
                    ): tf.contrib.metrics.streaming_mean_squared_error})
 
   def testTrainSaveLoad(self):
     """Tests that insures you can save and reload a trained model."""
-    def _input_fn(num_epochs=None):
-      features = {
-          'age': tf.train.limit_epochs(tf.constant([[0.8], [0.15], [0.]]),
-                                       num_epochs=num_epochs),
-          'language': tf.SparseTensor(values=['en', 'fr', 'zh'],
-                                      indices=[[0, 0], [0, 1], [2, 0]],
-                                      shape=[3, 2])
-      }
-      return features, tf.constant([1.0, 0., 0.2], dtype=tf.float32)
+    feature_columns = _REGRESSION_FEATURE_COLUMNS
 
-    feature_columns = [
-        tf.contrib.layers.sparse_column_with_hash_bucket('language',
-                                                         hash_bucket_size=20),
-        tf.contrib.layers.real_valued_column('age')
-    ]
-
-    model_dir = tempfile.mkdtemp()
+    model_dir = _fresh_temp_dir('regressor_saveload')
     regressor = tf.contrib.learn.LinearRegressor(
         model_dir=model_dir,
         feature_columns=feature_columns,
         config=tf.contrib.learn.RunConfig(tf_random_seed=1))
 
-    regressor.fit(input_fn=_input_fn, steps=100)
-    predict_input_fn = functools.partial(_input_fn, num_epochs=1)
-    predictions = list(regressor.predict(input_fn=predict_input_fn))
+    regressor.fit(input_fn=_regression_input_fn, steps=100)
+    predictions = regressor.predict(input_fn=_regression_input_fn,
+                                    as_iterable=False)
     del regressor
 
     regressor2 = tf.contrib.learn.LinearRegressor(
         model_dir=model_dir,
         feature_columns=feature_columns)
-    predictions2 = list(regressor2.predict(input_fn=predict_input_fn))
+    predictions2 = regressor2.predict(input_fn=_regression_input_fn,
+                                      as_iterable=False)
     self.assertAllClose(predictions, predictions2)
 
   def testTrainWithPartitionedVariables(self):
     """Tests training with partitioned variables."""
-    def _input_fn(num_epochs=None):
-      features = {
-          'age': tf.train.limit_epochs(tf.constant([[0.8], [0.15], [0.]]),
-                                       num_epochs=num_epochs),
-          'language': tf.SparseTensor(values=['en', 'fr', 'zh'],
-                                      indices=[[0, 0], [0, 1], [2, 0]],
-                                      shape=[3, 2])
-      }
-      return features, tf.constant([1.0, 0., 0.2], dtype=tf.float32)
-
     feature_columns = [
         # The given hash_bucket_size results in variables larger than the
         # default min_slice_size attribute, so the variables are partitioned.
@@ -1112,37 +1187,25 @@ class LinearRegressorTest(tf.test.TestCase):
             num_ps_replicas=2, cluster_spec=tf.train.ClusterSpec({}),
             tf_random_seed=1))
 
-    regressor.fit(input_fn=_input_fn, steps=100)
+    regressor.fit(input_fn=_regression_input_fn, steps=100,
+                  monitors=[_StopAtLoss(0.05)])
 
-    scores = regressor.evaluate(input_fn=_input_fn, steps=1)
+    scores = regressor.evaluate(input_fn=_regression_input_fn, steps=1)
     self.assertLess(scores['loss'], 0.1)
 
   def testDisableCenteredBias(self):
     """Tests that we can disable centered bias."""
-    def _input_fn(num_epochs=None):
-      features = {
-          'age': tf.train.limit_epochs(tf.constant([[0.8], [0.15], [0.]]),
-                                       num_epochs=num_epochs),
-          'language': tf.SparseTensor(values=['en', 'fr', 'zh'],
-                                      indices=[[0, 0], [0, 1], [2, 0]],
-                                      shape=[3, 2])
-      }
-      return features, tf.constant([1.0, 0., 0.2], dtype=tf.float32)
-
-    feature_columns = [
-        tf.contrib.layers.sparse_column_with_hash_bucket('language',
-                                                         hash_bucket_size=20),
-        tf.contrib.layers.real_valued_column('age')
-    ]
+    feature_columns = _REGRESSION_FEATURE_COLUMNS
 
     regressor = tf.contrib.learn.LinearRegressor(
         feature_columns=feature_columns,
         enable_centered_bias=False,
         config=tf.contrib.learn.RunConfig(tf_random_seed=1))
 
-    regressor.fit(input_fn=_input_fn, steps=100)
+    regressor.fit(input_fn=_regression_input_fn, steps=100,
+                  monitors=[_StopAtLoss(0.05)])
 
-    scores = regressor.evaluate(input_fn=_input_fn, steps=1)
+    scores = regressor.evaluate(input_fn=_regression_input_fn, steps=1)
     self.assertLess(scores['loss'], 0.1)
 
   def testRecoverWeights(self):
@@ -1154,6 +1217,10 @@ class LinearRegressorTest(tf.test.TestCase):
     weights = 10 * rng.randn(n_weights)
     y = np.dot(x, weights)
     y += rng.randn(len(x)) * 0.05 + rng.normal(bias, 0.01)
+    # Feed float32 data so the input queues don't carry float64 batches that
+    # the model casts down anyway.
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    y = np.ascontiguousarray(y.reshape(-1, 1), dtype=np.float32)
     feature_columns = tf.contrib.learn.infer_real_valued_columns_from_input(x)
     regressor = tf.contrib.learn.LinearRegressor(
         feature_columns=feature_columns,
@@ -1197,22 +1264,24 @@ class LinearRegressorTest(tf.test.TestCase):
       return {
           'example_id': tf.constant(['1', '2', '3']),
           'price': tf.constant([[0.6], [0.8], [0.3]]),
-          'sq_footage': tf.constant([[900.0], [700.0], [600.0]]),
-          'country': tf.SparseTensor(
-              values=['IT', 'US', 'GB'],
-              indices=[[0, 0], [1, 3], [2, 1]],
-              shape=[3, 5]),
+          'sq_footage': tf.constant(_SQ_FOOTAGE),
+          'country': tf.SparseTensor.from_value(_COUNTRY_VALUE),
+          'sq_footage_country': tf.SparseTensor.from_value(
+              _SQ_FOOTAGE_COUNTRY_VALUE),
           'weights': tf.constant([[3.0], [5.0], [7.0]])
       }, tf.constant([[1.55], [-1.25], [-3.0]])
 
     price = tf.contrib.layers.real_valued_column('price')
     sq_footage_bucket = tf.contrib.layers.bucketized_column(
         tf.contrib.layers.real_valued_column('sq_footage'),
-        boundaries=[650.0, 800.0])
+        boundaries=_SQ_FOOTAGE_BOUNDARIES)
     country = tf.contrib.layers.sparse_column_with_hash_bucket(
         'country', hash_bucket_size=5)
-    sq_footage_country = tf.contrib.layers.crossed_column(
-        [sq_footage_bucket, country], hash_bucket_size=10)
+    # The cross is fed precomputed instead of hashed by crossed_column.
+    sq_footage_country = (
+        tf.contrib.layers.sparse_column_with_integerized_feature(
+            'sq_footage_country',
+            bucket_size=(len(_SQ_FOOTAGE_BOUNDARIES) + 1) * len(_COUNTRIES)))
     sdca_optimizer = tf.contrib.linear_optimizer.SDCAOptimizer(
         example_id_column='example_id', symmetric_l2_regularization=1.0)
     regressor = tf.contrib.learn.LinearRegressor(
@@ -1230,10 +1299,7 @@ class LinearRegressorTest(tf.test.TestCase):
       return {
           'example_id': tf.constant(['1', '2', '3']),
           'price': tf.constant([[0.4], [0.6], [0.3]]),
-          'country': tf.SparseTensor(
-              values=['IT', 'US', 'GB'],
-              indices=[[0, 0], [1, 3], [2, 1]],
-              shape=[3, 5]),
+          'country': tf.SparseTensor.from_value(_COUNTRY_VALUE),
           'weights': tf.constant([[10.0], [10.0], [10.0]])
       }, tf.constant([[1.4], [-0.8], [2.6]])
 
@@ -1270,10 +1336,8 @@ class LinearRegressorTest(tf.test.TestCase):
     # L1 norm.
     l1_reg_weights_norm, no_l1_reg_weights_norm = 0.0, 0.0
     for var_name in sorted(l1_reg_weights):
-      l1_reg_weights_norm += sum(
-          np.absolute(l1_reg_weights[var_name].flatten()))
-      no_l1_reg_weights_norm += sum(
-          np.absolute(no_l1_reg_weights[var_name].flatten()))
+      l1_reg_weights_norm += np.abs(l1_reg_weights[var_name]).sum()
+      no_l1_reg_weights_norm += np.abs(no_l1_reg_weights[var_name]).sum()
       print('Var name: %s, value: %s' %
             (var_name, no_l1_reg_weights[var_name].flatten()))
     self.assertLess(l1_reg_weights_norm, no_l1_reg_weights_norm)
@@ -1334,15 +1398,13 @@ class LinearRegressorTest(tf.test.TestCase):
       Returns:
         The test dataset.
       """
-      num_examples = 200
-      half = int(num_examples/2)
+      num_examples = 2 * _SDCA_HALF
+      ab = tf.constant(_SDCA_AB)
       return {
           'example_id': tf.constant([str(x+1) for x in range(num_examples)]),
-          'a': tf.constant([[1]]*int(half) + [[0]]*int(half)),
-          'b': tf.constant([[0]]*int(half) + [[1]]*int(half)),
-      }, tf.constant([[x] for x in
-                      [1, 0, 0, 1, 1, 0, 0, 0, 1, 0] * int(half/10) +
-                      [0, 1, 0, 0, 0, 0, 0, 0, 1, 0] * int(half/10)])
+          'a': ab[:, 0:1],
+          'b': ab[:, 1:2],
+      }, tf.constant(_SDCA_LABELS)
 
     sdca_optimizer = tf.contrib.linear_optimizer.SDCAOptimizer(
         example_id_column='example_id')
@@ -1376,14 +1438,13 @@ class LinearRegressorTest(tf.test.TestCase):
       Returns:
         The test dataset.
       """
-      num_examples = 200
-      half = int(num_examples/2)
+      num_examples = 2 * _SDCA_HALF
+      ab = tf.constant(_SDCA_AB)
       return {
           'example_id': tf.constant([str(x+1) for x in range(num_examples)]),
-          'a': tf.constant([[1]]*int(half) + [[0]]*int(half)),
-          'b': tf.constant([[0]]*int(half) + [[1]]*int(half)),
-      }, tf.constant([[1 if x%10 == 0 else 0] for x in range(half)] +
-                     [[-1 if x%10 == 0 else 0] for x in range(half)])
+          'a': ab[:, 0:1],
+          'b': ab[:, 1:2],
+      }, tf.constant(_SDCA_CENTERED_LABELS)
 
     sdca_optimizer = tf.contrib.linear_optimizer.SDCAOptimizer(
         example_id_column='example_id')
@@ -1400,11 +1461,15 @@ class LinearRegressorTest(tf.test.TestCase):
     self.assertNear(regressor.weights_['linear/b/weight'][0], -0.1, err=0.05)
 
 
+_BOSTON = tf.contrib.learn.datasets.load_boston()
+_BOSTON_DATA = np.ascontiguousarray(_BOSTON.data.reshape(-1, 13),
+                                    dtype=np.float32)
+_BOSTON_TARGET = np.ascontiguousarray(_BOSTON.target.reshape(-1, 1),
+                                      dtype=np.float32)
+
+
 def boston_input_fn():
-  boston = tf.contrib.learn.datasets.load_boston()
-  features = tf.cast(tf.reshape(tf.constant(boston.data), [-1, 13]), tf.float32)
-  labels = tf.cast(tf.reshape(tf.constant(boston.target), [-1, 1]), tf.float32)
-  return features, labels
+  return tf.constant(_BOSTON_DATA), tf.constant(_BOSTON_TARGET)
 
 
 class FeatureColumnTest(tf.test.TestCase):